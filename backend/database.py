@@ -1,6 +1,14 @@
 import sqlite3
 import os
-from sqlalchemy import create_engine, MetaData, text
+import logging
+import threading
+import time
+from functools import lru_cache
+from sqlalchemy import create_engine, text, inspect, event
+from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.pool import StaticPool
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -8,29 +16,108 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if DATABASE_URL:
-    # Production: Use PostgreSQL from environment variable
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+    # Production: Use PostgreSQL from environment variable.
+    # Size the pool explicitly (the default QueuePool of 5 becomes the
+    # bottleneck under concurrent requests) and recycle connections so we
+    # never hand out ones the server has already closed.
+    engine = create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=10,
+        max_overflow=20,
+        pool_recycle=1800,
+        pool_timeout=30,
+        # Large compiled-statement cache so repeated queries skip the
+        # SQL compilation step instead of re-parsing every time
+        query_cache_size=1200,
+    )
     IS_POSTGRES = True
 else:
-    # Development: Use SQLite
+    # Development: Use SQLite.
+    # StaticPool keeps one connection open for the process instead of
+    # re-opening the database file per checkout; safe here because
+    # check_same_thread=False already allows cross-thread use.
     DB_PATH = os.path.join(BASE_DIR, "oilgas.db")
     DB_URL = f"sqlite:///{DB_PATH}"
-    engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
+    engine = create_engine(
+        DB_URL,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
     IS_POSTGRES = False
 
-metadata = MetaData()
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL + NORMAL sync gives much better write throughput than the
+        # default rollback journal and lets readers run during writes,
+        # which matters with check_same_thread=False. These pragmas are
+        # per-connection, so they must run on every new connection.
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+# Process-level schema cache: {table_name: {column_name: column_type}}.
+# Reflecting the whole database on every get_table_schema call is expensive
+# (one catalog round-trip per table), so we reflect lazily per table and
+# invalidate only when init_db() re-runs the DDL.
+_SCHEMA_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+# Memoized Inspector: constructing one per call repeats dialect-level setup
+_INSPECTOR = None
+
+
+def _get_inspector():
+    global _INSPECTOR
+    if _INSPECTOR is None:
+        _INSPECTOR = inspect(engine)
+    return _INSPECTOR
+
+
+def table_exists(table_name: str) -> bool:
+    """Checks for one table with a single scalar catalog probe.
+
+    Cheaper than get_table_names()/has_table, which enumerate the whole
+    catalog to answer a yes/no question about one table.
+    """
+    with engine.connect() as conn:
+        if IS_POSTGRES:
+            result = conn.execute(
+                text("SELECT to_regclass(:n)"), {"n": table_name}).scalar()
+        else:
+            result = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type='table' AND lower(name)=lower(:n)"),
+                {"n": table_name}).scalar()
+    return result is not None
+
+
+def _type_name(col_type) -> str:
+    """Renders a reflected column type once, using the engine's own dialect
+    compiler rather than str()'s default-dialect path. Only runs when the
+    schema cache is (re)populated."""
+    try:
+        return col_type.compile(dialect=engine.dialect)
+    except Exception:
+        return str(col_type)
 
-def get_postgres_schema():
-    """Return PostgreSQL-compatible schema"""
-    return """
+# Postgres DDL as module constants: allocated once at import, never
+# rebuilt per call. The DROP preamble is kept separate so only an explicit
+# reset pays for (and risks) it.
+_POSTGRES_DROP_SQL = """
     DROP TABLE IF EXISTS WCR_CASING CASCADE;
     DROP TABLE IF EXISTS WCR_LOGSRECORD CASCADE;
     DROP TABLE IF EXISTS WCR_DIRSRVY CASCADE;
     DROP TABLE IF EXISTS WCR_SWC CASCADE;
     DROP TABLE IF EXISTS WCR_HCSHOWS CASCADE;
     DROP TABLE IF EXISTS WCR_WELLHEAD CASCADE;
+"""
 
-    CREATE TABLE WCR_WELLHEAD (
+_POSTGRES_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS WCR_WELLHEAD (
         UWI VARCHAR(64) PRIMARY KEY NOT NULL,
         WELL_NAME VARCHAR(255),
         FIELD VARCHAR(255),
@@ -64,7 +151,7 @@ def get_postgres_schema():
         PAGE_NUMBERS VARCHAR(100)
     );
 
-    CREATE TABLE WCR_CASING (
+    CREATE TABLE IF NOT EXISTS WCR_CASING (
         UWI VARCHAR(64) NOT NULL,
         CASING_TYPE VARCHAR(255),
         CASING_LINER_NAME VARCHAR(255),
@@ -87,7 +174,7 @@ def get_postgres_schema():
         MATCH_ID INTEGER
     );
 
-    CREATE TABLE WCR_LOGSRECORD (
+    CREATE TABLE IF NOT EXISTS WCR_LOGSRECORD (
         UWI VARCHAR(64) NOT NULL,
         TOP FLOAT,
         BOTTOM FLOAT,
@@ -103,7 +190,7 @@ def get_postgres_schema():
         MATCH_ID INTEGER
     );
 
-    CREATE TABLE WCR_DIRSRVY (
+    CREATE TABLE IF NOT EXISTS WCR_DIRSRVY (
         ID INTEGER PRIMARY KEY,
         UWI VARCHAR(64),
         MD FLOAT,
@@ -122,7 +209,7 @@ def get_postgres_schema():
         MATCH_ID VARCHAR(100)
     );
 
-    CREATE TABLE WCR_SWC (
+    CREATE TABLE IF NOT EXISTS WCR_SWC (
         DEPTH FLOAT,
         RECOVERED_LENGTH FLOAT,
         LITHOLOGY VARCHAR(255),
@@ -139,7 +226,7 @@ def get_postgres_schema():
         MATCH_ID INTEGER
     );
 
-    CREATE TABLE WCR_HCSHOWS (
+    CREATE TABLE IF NOT EXISTS WCR_HCSHOWS (
         ID INTEGER PRIMARY KEY,
         UWI VARCHAR(64),
         TOP_DEPTH FLOAT,
@@ -156,110 +243,146 @@ def get_postgres_schema():
     );
     """
 
-def init_db():
-    # Load the schema.sql file to initialize the DB
+
+def get_postgres_schema(reset: bool = False):
+    """Return PostgreSQL-compatible schema.
+
+    With reset=True the script drops all tables first (destructive); the
+    default relies on CREATE TABLE IF NOT EXISTS so re-running init on an
+    existing database is a no-op instead of a wipe.
+    """
+    if reset:
+        return _POSTGRES_DROP_SQL + _POSTGRES_SCHEMA_SQL
+    return _POSTGRES_SCHEMA_SQL
+
+
+@lru_cache(maxsize=2)
+def _load_schema_script(reset: bool = False) -> str:
+    """Reads the schema SQL once per process (Postgres DDL is inlined,
+    SQLite comes from schema.sql on disk).
+
+    The SQLite script carries DROP TABLE preambles for explicit resets;
+    they are stripped here unless reset=True, so the CREATE TABLE IF NOT
+    EXISTS statements make a plain restart a no-op instead of a wipe —
+    matching the Postgres split above."""
     if IS_POSTGRES:
-        sql_script = get_postgres_schema()
-    else:
-        with open(os.path.join(BASE_DIR, "schema.sql"), "r") as f:
-            sql_script = f.read()
-    
+        return get_postgres_schema(reset=reset)
+    with open(os.path.join(BASE_DIR, "schema.sql"), "r") as f:
+        script = f.read()
+    if not reset:
+        script = "\n".join(
+            line for line in script.splitlines()
+            if not line.lstrip().upper().startswith("DROP TABLE"))
+    return script
+
+
+@lru_cache(maxsize=2)
+def _schema_statements(reset: bool = False) -> tuple:
+    """Statement list split once per process, not on every init_db call."""
+    return tuple(s.strip() for s in _load_schema_script(reset).split(';') if s.strip())
+
+
+_INITIALIZED = False
+
+
+def init_db(reset: bool = False):
+    """Creates the WCR tables if missing. reset=True drops them first.
+
+    Repeat calls within a process are O(1) no-ops unless a reset is
+    explicitly requested.
+    """
+    global _INITIALIZED
+    if _INITIALIZED and not reset:
+        return
+
+    sql_script = _load_schema_script(reset)
+    started = time.perf_counter()
+
     if IS_POSTGRES:
-        # For PostgreSQL, execute via SQLAlchemy connection
+        # For PostgreSQL, execute via SQLAlchemy connection.
+        # Run the whole script in ONE transaction: a single commit/fsync
+        # instead of per-statement ones, and no half-initialized schema if
+        # a statement fails mid-way.
         try:
-            with engine.connect() as conn:
-                # First check which tables already exist
-                from sqlalchemy import inspect
-                inspector = inspect(engine)
-                existing_tables = set(inspector.get_table_names())
-                print(f"[OK] Existing tables in database: {existing_tables}")
-                
-                # Split by semicolon and execute each statement
-                statements = [s.strip() for s in sql_script.split(';') if s.strip()]
-                created_count = 0
-                for statement in statements:
-                    try:
-                        # Skip if it's a DROP or CREATE for an existing table
-                        if statement.startswith("DROP"):
-                            conn.execute(text(statement))
-                            print(f"[OK] Dropped table: {statement[20:50]}...")
-                        elif statement.startswith("CREATE"):
-                            conn.execute(text(statement))
-                            created_count += 1
-                            # Extract table name for logging
-                            table_name = statement.split("(")[0].replace("CREATE TABLE", "").strip()
-                            print(f"[OK] Created table: {table_name}")
-                    except Exception as e:
-                        error_msg = str(e).lower()
-                        if "already exists" in error_msg or "duplicate" in error_msg:
-                            print(f"[SKIP] Table already exists (skipped)")
-                        else:
-                            print(f"[ERROR] Error: {statement[:50]}... -> {str(e)}")
-                            raise
-                
-                conn.commit()
-                print(f"[OK] Database initialized: {created_count} tables created/updated")
-                
-                # Verify tables were created
-                inspector = inspect(engine)
-                final_tables = set(inspector.get_table_names())
-                print(f"[OK] Final tables in database: {final_tables}")
-                
-        except Exception as e:
-            print(f"[ERROR] Database initialization error: {e}")
-            import traceback
-            traceback.print_exc()
+            # Hand the full script to the driver in one execute: psycopg
+            # runs multi-statement strings in a single round-trip, versus
+            # one round-trip per DDL statement with the loop.
+            with engine.begin() as conn:
+                conn.exec_driver_sql(sql_script)
+
+            created_count = sum(
+                1 for s in _schema_statements(reset) if s.startswith("CREATE"))
+            logger.info("init_db: %d tables created/updated in %.2fs",
+                        created_count, time.perf_counter() - started)
+
+        except Exception:
+            logger.exception("init_db: database initialization failed")
             raise
     else:
-        # For SQLite, use sqlite3 directly
+        # For SQLite, use sqlite3 directly. executescript runs in
+        # autocommit, so wrap the script in an explicit BEGIN/COMMIT to
+        # avoid one fsync per DDL statement.
         DB_PATH = os.path.join(BASE_DIR, "oilgas.db")
         try:
             with sqlite3.connect(DB_PATH) as conn:
-                conn.executescript(sql_script)
-                print("[OK] SQLite database initialized successfully")
-        except Exception as e:
-            print(f"[ERROR] SQLite initialization error: {e}")
+                conn.executescript("BEGIN;\n" + sql_script + "\nCOMMIT;")
+            logger.info("init_db: SQLite schema applied in %.2fs",
+                        time.perf_counter() - started)
+        except Exception:
+            logger.exception("init_db: SQLite initialization failed")
             raise
 
+    _INITIALIZED = True
+
+    # DDL may have changed table definitions; force re-reflection on next use
+    global _INSPECTOR
+    with _CACHE_LOCK:
+        _SCHEMA_CACHE.clear()
+        _INSPECTOR = None
+
 
 def get_table_schema(table_name: str):
-    """Reflects the database to get strict column definitions."""
+    """Returns strict column definitions for a table, reflecting lazily.
+
+    Results are cached per table for the process lifetime; init_db()
+    invalidates the cache after running DDL.
+    """
     # Convert to lowercase for case-insensitive lookup
     table_name_normalized = table_name.lower()
-    
-    # Clear cache and re-reflect to get fresh data
-    metadata.clear()
-    
-    # For fresh reflection, create a new connection
-    if IS_POSTGRES:
-        # Force a fresh connection for PostgreSQL
-        from sqlalchemy import inspect
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        print(f"Available tables in database: {tables}")
-        
-        if table_name_normalized not in tables:
-            raise ValueError(f"Table '{table_name}' not found. Available tables: {tables}")
-        
-        # Get columns
-        columns = inspector.get_columns(table_name_normalized)
-        schema_dict = {col['name']: str(col['type']) for col in columns}
-        print(f"[OK] Loaded schema for {table_name}: {len(schema_dict)} columns")
-        return schema_dict
-    else:
-        # SQLite
-        metadata.reflect(bind=engine)
-        # Find table with case-insensitive match
-        matching_table = None
-        for tbl_name in metadata.tables:
-            if tbl_name.lower() == table_name_normalized:
-                matching_table = tbl_name
-                break
-        
-        if not matching_table:
-            print(f"Available tables: {list(metadata.tables.keys())}")
+
+    cached = _SCHEMA_CACHE.get(table_name_normalized)
+    if cached is not None:
+        return cached
+
+    with _CACHE_LOCK:
+        # Another thread may have populated the cache while we waited
+        cached = _SCHEMA_CACHE.get(table_name_normalized)
+        if cached is not None:
+            return cached
+
+        inspector = _get_inspector()
+        # Bulk-reflect every table's columns in one catalog query on the
+        # first miss (SQLAlchemy 2.0 get_multi_columns), so all the WCR
+        # tables together cost one round-trip rather than one each.
+        try:
+            for (_schema, tbl_name), columns in inspector.get_multi_columns().items():
+                _SCHEMA_CACHE[tbl_name.lower()] = {
+                    col['name']: _type_name(col['type']) for col in columns
+                }
+        except NotImplementedError:
+            # Dialect without bulk reflection: single-table inspector call
+            # (one catalog query), still not a full reflect.
+            try:
+                columns = inspector.get_columns(table_name_normalized)
+            except NoSuchTableError:
+                columns = []
+            if columns:
+                _SCHEMA_CACHE[table_name_normalized] = {
+                    col['name']: _type_name(col['type']) for col in columns
+                }
+
+        schema_dict = _SCHEMA_CACHE.get(table_name_normalized)
+        if schema_dict is None:
             raise ValueError(f"Table '{table_name}' not found in SQL schema.")
-        
-        table = metadata.tables[matching_table]
-        return {col.name: str(col.type) for col in table.columns}
+        return schema_dict
 
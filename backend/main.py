@@ -1,48 +1,85 @@
 import os
 import shutil
 import json
+import orjson
+import csv
+import asyncio
+import hashlib
+import io
+import mmap
+import aiofiles
+from types import SimpleNamespace
 from typing import List, Dict, Any, Optional
-from contextlib import asynccontextmanager
-from collections import defaultdict
+import atexit
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from collections import defaultdict, OrderedDict
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-import pdfplumber
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 import pandas as pd
+import numpy as np
 from pydantic import BaseModel
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from PIL import Image
 import pytesseract
 import re
+from functools import lru_cache
 import google.generativeai as genai
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from database import init_db, get_table_schema, engine
-from sqlalchemy import inspect
+# Tesseract's internal OpenMP parallelism is a net loss for single-image
+# jobs (it oversubscribes cores that request handling needs); pin it to one
+# thread and parallelize at the request/region level instead. Must be set
+# before the first tesseract subprocess is spawned.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+from database import init_db, get_table_schema, engine, table_exists
+from sqlalchemy import select, tuple_
+from sqlalchemy import column as sql_column, table as sql_table
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("DEBUG: Server starting up...")
+    # Extraction/validation work runs via asyncio.to_thread, which uses
+    # the event loop's default ThreadPoolExecutor (capped at
+    # min(32, cpu + 4)); install a wider one so parallel region
+    # extractions aren't queued behind each other
+    from concurrent.futures import ThreadPoolExecutor
+    app.state.thread_pool = ThreadPoolExecutor(max_workers=64)
+    asyncio.get_running_loop().set_default_executor(app.state.thread_pool)
     try:
         init_db()
         print("[OK] Database initialized")
+        # Warm the schema cache for every known table so the first request
+        # to each endpoint doesn't pay the reflection round-trip
+        for tbl in set(LABEL_TO_TABLE.values()):
+            try:
+                _schema_bundle(tbl)
+            except Exception:
+                pass
     except Exception as e:
         print(f"[ERROR] Database init failed: {e}")
         import traceback
         traceback.print_exc()
-    
+
+    # Long-lived pool for /extract-batch: workers are forked and warmed
+    # once here instead of per request
+    from concurrent.futures import ProcessPoolExecutor
+    app.state.pool = ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1, initializer=_batch_worker_init)
+
     yield  # Server is running
-    
+
     # Shutdown
     print("DEBUG: Server shutting down...")
+    app.state.pool.shutdown(cancel_futures=True)
+    app.state.thread_pool.shutdown(wait=False)
 
-app = FastAPI(title="Well Completion Extractor", lifespan=lifespan)
+app = FastAPI(title="Well Completion Extractor", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
 
 # CORS Setup
 app.add_middleware(
@@ -97,6 +134,279 @@ LABEL_TO_TABLE = {
 
 # --- LOGIC ---
 
+# Opened-PDF cache: pdfplumber.open runs a full pdfminer parse, which can
+# take seconds on sizeable reports. Users snip many regions from the same
+# upload, so keep recently opened handles keyed by (path, mtime) — the
+# mtime in the key makes re-uploads of the same filename miss cleanly.
+#
+# pdfminer is not thread-safe (concurrent extractions interleave seeks on
+# the one shared stream), so every handle carries its own RLock: callers
+# go through _pdf_handle, which serializes work per document while
+# letting different documents proceed in parallel, and _close_pdf takes
+# the same lock so eviction can never close a handle mid-extraction.
+_PDF_CACHE = OrderedDict()
+_PDF_CACHE_MAX = 8
+_PDF_CACHE_LOCK = threading.Lock()
+
+def _close_pdf(pdf):
+    """Closes a cached handle plus its backing mmap, ignoring errors.
+
+    Waits on the per-handle lock, so an in-flight extraction finishes
+    before the stream goes away; the _closed flag tells waiters that the
+    handle they were queued on is dead and must be re-fetched.
+    """
+    lock = getattr(pdf, "_handle_lock", None)
+    with (lock if lock is not None else nullcontext()):
+        pdf._closed = True
+        for obj in (pdf, getattr(pdf, "_mm_buffer", None), getattr(pdf, "_mm_file", None)):
+            if obj is not None:
+                try:
+                    obj.close()
+                except Exception:
+                    pass
+
+def _get_pdf(pdf_path: str):
+    """Returns a cached pdfplumber.PDF handle for the path.
+
+    Callers that touch the document must hold pdf._handle_lock — use
+    _pdf_handle instead of calling this directly.
+    """
+    # Deferred import: pdfplumber (and pdfminer behind it) costs a few
+    # hundred ms and several MB of RSS that JSON-only endpoints never need
+    import pdfplumber
+
+    key = (pdf_path, os.path.getmtime(pdf_path))
+    with _PDF_CACHE_LOCK:
+        pdf = _PDF_CACHE.get(key)
+        if pdf is not None:
+            _PDF_CACHE.move_to_end(key)
+            return pdf
+
+    # Memory-map the file so pdfminer seeks hit the kernel page cache —
+    # shared across uvicorn workers parsing the same upload — instead of a
+    # private heap copy per process
+    fh = open(pdf_path, "rb")
+    try:
+        buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        fh.close()
+        buf = None
+
+    if buf is not None:
+        try:
+            pdf = pdfplumber.open(buf)
+        except Exception:
+            buf.close()
+            fh.close()
+            raise
+        pdf._mm_buffer = buf
+        pdf._mm_file = fh
+    else:
+        pdf = pdfplumber.open(pdf_path)
+    pdf._handle_lock = threading.RLock()
+    pdf._closed = False
+
+    to_close = []
+    with _PDF_CACHE_LOCK:
+        # Drop stale entries for the same path (old mtime), then the oldest
+        # entries beyond the cap. Closing happens after the cache lock is
+        # released: _close_pdf blocks on the handle lock, and a holder of
+        # that lock may be about to ask the cache for another document.
+        for stale_key in [k for k in _PDF_CACHE if k[0] == pdf_path and k != key]:
+            to_close.append(_PDF_CACHE.pop(stale_key))
+        _PDF_CACHE[key] = pdf
+        while len(_PDF_CACHE) > _PDF_CACHE_MAX:
+            _, oldest = _PDF_CACHE.popitem(last=False)
+            to_close.append(oldest)
+    for stale in to_close:
+        _close_pdf(stale)
+    return pdf
+
+@contextmanager
+def _pdf_handle(pdf_path: str):
+    """Yields the cached handle with its lock held for the duration.
+
+    Retries when the handle got evicted and closed between the cache
+    lookup and the lock acquisition — the next lookup reopens it.
+    """
+    while True:
+        pdf = _get_pdf(pdf_path)
+        with pdf._handle_lock:
+            if not pdf._closed:
+                yield pdf
+                return
+        # Dead handle: make sure the cache no longer serves it, then retry
+        with _PDF_CACHE_LOCK:
+            for k in [k for k, v in _PDF_CACHE.items() if v is pdf]:
+                del _PDF_CACHE[k]
+
+@atexit.register
+def _close_cached_pdfs():
+    for pdf in _PDF_CACHE.values():
+        _close_pdf(pdf)
+    with _PDFIUM_OP_LOCK:
+        for doc in _PDFIUM_CACHE.values():
+            try:
+                doc.close()
+            except Exception:
+                pass
+
+# Parallel cache of pypdfium2 handles. PDFium (a C engine) answers "is
+# there any embedded text in this rectangle?" in single-digit ms, where
+# pdfminer needs a full layout pass — we use it as a cheap probe before
+# committing to pdfplumber's table extraction.
+#
+# pypdfium2 requires external locking for multi-threaded use (the PDFium
+# library itself is not thread-safe), so every document operation —
+# open, page/textpage access, close — runs under _PDFIUM_OP_LOCK. The
+# probes are single-digit ms, so one global lock costs little. It is an
+# RLock because _get_pdfium (which may open and close documents) is
+# called from _pdfium_region_text while the lock is already held.
+_PDFIUM_CACHE = OrderedDict()
+_PDFIUM_CACHE_LOCK = threading.Lock()
+_PDFIUM_OP_LOCK = threading.RLock()
+
+def _get_pdfium(pdf_path: str):
+    """Returns a cached pypdfium2.PdfDocument for the path.
+
+    Callers must hold _PDFIUM_OP_LOCK — PDFium is not thread-safe, and
+    the lock also guarantees no other thread is mid-read on a document
+    this call evicts and closes.
+    """
+    import pypdfium2 as pdfium
+
+    key = (pdf_path, os.path.getmtime(pdf_path))
+    with _PDFIUM_CACHE_LOCK:
+        doc = _PDFIUM_CACHE.get(key)
+        if doc is not None:
+            _PDFIUM_CACHE.move_to_end(key)
+            return doc
+
+    doc = pdfium.PdfDocument(pdf_path)
+
+    to_close = []
+    with _PDFIUM_CACHE_LOCK:
+        for stale_key in [k for k in _PDFIUM_CACHE if k[0] == pdf_path and k != key]:
+            to_close.append(_PDFIUM_CACHE.pop(stale_key))
+        _PDFIUM_CACHE[key] = doc
+        while len(_PDFIUM_CACHE) > _PDF_CACHE_MAX:
+            _, oldest = _PDFIUM_CACHE.popitem(last=False)
+            to_close.append(oldest)
+    for stale in to_close:
+        stale.close()
+    return doc
+
+def _pdfium_region_text(pdf_path: str, page_number: int, bbox, page_height: float):
+    """Embedded text inside a crop box, via PDFium (C engine).
+
+    bbox is pdfplumber-style (x0, top, x1, bottom) with a top-left origin;
+    PDFium wants bottom-left-origin coordinates, hence the flip. Returns
+    None when PDFium itself fails, so callers can distinguish "no text"
+    from "probe broken".
+    """
+    try:
+        with _PDFIUM_OP_LOCK:
+            doc = _get_pdfium(pdf_path)
+            page = doc[page_number - 1]
+            textpage = page.get_textpage()
+            x0, top, x1, bottom = bbox
+            return textpage.get_text_bounded(
+                left=x0, bottom=page_height - bottom, right=x1, top=page_height - top)
+    except Exception as e:
+        print(f"DEBUG: pdfium text extraction failed: {e}")
+        return None
+
+def _region_has_text(pdf_path: str, page_number: int, bbox, page_height: float) -> bool:
+    """Cheap PDFium probe for embedded text inside a crop box."""
+    text = _pdfium_region_text(pdf_path, page_number, bbox, page_height)
+    if text is None:
+        # On any probe failure assume text is present so the pdfplumber
+        # path still runs
+        return True
+    return bool(text.strip())
+
+# OCR result cache: users re-select the same or similar regions repeatedly,
+# and Tesseract costs 50-260ms per crop while hashing the pixels costs ~1ms.
+# Keyed by image pixels + OCR config so a changed preprocessing step misses.
+_OCR_CACHE = OrderedDict()
+_OCR_CACHE_MAX = 256
+_OCR_CACHE_LOCK = threading.Lock()
+
+def _otsu_threshold(arr) -> int:
+    """Otsu's method on a grayscale array, vectorized over the histogram."""
+    hist = np.bincount(arr.ravel(), minlength=256).astype(np.float64)
+    total = arr.size
+    bins = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    cum_sum = np.cumsum(hist * bins)
+    sum_total = cum_sum[-1]
+    mean_bg = np.divide(cum_sum, weight_bg,
+                        out=np.zeros(256), where=weight_bg > 0)
+    mean_fg = np.divide(sum_total - cum_sum, weight_fg,
+                        out=np.zeros(256), where=weight_fg > 0)
+    between_var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between_var))
+
+
+def _preprocess_for_ocr(img):
+    """Prepares a cropped image for Tesseract.
+
+    Grayscale, upscale genuinely small crops (2x LANCZOS), then Otsu-
+    binarize: a clean black/white image lets Tesseract skip most of its
+    internal thresholding work and markedly improves recall on scans.
+    """
+    from PIL import Image
+
+    img = img.convert('L')
+    if min(img.size) < 300:
+        new_size = (img.width * 2, img.height * 2)
+        resample_method = getattr(Image, 'Resampling', Image).LANCZOS
+        img = img.resize(new_size, resample_method)
+    arr = np.asarray(img)
+    threshold = _otsu_threshold(arr)
+    bw = np.where(arr > threshold, 255, 0).astype(np.uint8)
+    return Image.fromarray(bw)
+
+
+def _ocr_image_to_string(img, config: str) -> str:
+    """image_to_string with an LRU cache over the exact pixel content."""
+    digest = hashlib.blake2b(img.tobytes(), digest_size=16).digest()
+    key = (digest, img.size, img.mode, config)
+    with _OCR_CACHE_LOCK:
+        cached = _OCR_CACHE.get(key)
+        if cached is not None:
+            _OCR_CACHE.move_to_end(key)
+            return cached
+
+    text = pytesseract.image_to_string(img, config=config)
+    with _OCR_CACHE_LOCK:
+        _OCR_CACHE[key] = text
+        while len(_OCR_CACHE) > _OCR_CACHE_MAX:
+            _OCR_CACHE.popitem(last=False)
+    return text
+
+# A full-page selection rendered at 600 dpi runs to tens of millions of
+# pixels; cap what is held (and handed to Tesseract) at once by OCRing
+# oversized crops as horizontal strips
+_OCR_MAX_PIXELS = 50_000_000
+
+def _ocr_in_strips(img, config: str) -> str:
+    """OCR an image, tiling into horizontal strips when it is oversized.
+
+    Bounds peak memory at roughly _OCR_MAX_PIXELS regardless of the
+    selection size; normal crops take the single-shot path.
+    """
+    if img.width * img.height <= _OCR_MAX_PIXELS:
+        return _ocr_image_to_string(img, config)
+
+    strip_h = max(1, _OCR_MAX_PIXELS // img.width)
+    texts = []
+    for top in range(0, img.height, strip_h):
+        strip = img.crop((0, top, img.width, min(img.height, top + strip_h)))
+        texts.append(_ocr_image_to_string(strip, config))
+    return "\n".join(texts)
+
 # Configure pytesseract (handle common Windows/Linux/macOS installation paths)
 TESSERACT_AVAILABLE = False
 
@@ -132,16 +442,79 @@ setup_pytesseract()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Exact-match cache for Gemini responses. Users re-crop slightly and
+# retry the same region constantly; an identical (table, text) pair will
+# get the same answer, so skip the multi-second round trip and the token
+# spend. Only successful parses are cached — failures should retry.
+_GEMINI_CACHE = OrderedDict()
+_GEMINI_CACHE_MAX = 1024
+_GEMINI_CACHE_LOCK = threading.Lock()
+
+def _gemini_cache_get(kind: str, *parts):
+    key = hashlib.sha256("\x00".join((kind,) + parts).encode()).hexdigest()
+    with _GEMINI_CACHE_LOCK:
+        hit = _GEMINI_CACHE.get(key)
+        if hit is not None:
+            _GEMINI_CACHE.move_to_end(key)
+    return key, hit
+
+def _gemini_cache_put(key: str, value):
+    with _GEMINI_CACHE_LOCK:
+        _GEMINI_CACHE[key] = value
+        while len(_GEMINI_CACHE) > _GEMINI_CACHE_MAX:
+            _GEMINI_CACHE.popitem(last=False)
+
+# The rules never change, so they live in the model's system_instruction
+# rather than being re-sent as prompt text. Gemini's implicit prefix cache
+# is keyed on the stable (system_instruction + prompt prefix) bytes, so a
+# byte-identical preamble across calls is what makes it hit.
+_PARSE_INSTRUCTIONS = """You are a data extraction assistant. Your task is to extract the data exactly as it appears in the provided text, preserving the table structure.
+
+Instructions:
+1. Analyze the text to identify if it contains a table or key-value pairs.
+2. If it is a table, extract every row and column exactly as they appear.
+3. Use the headers found in the text as JSON keys. If headers are missing or unclear, use the 'Potential Column Names' to infer the best matching key.
+4. Do not skip any rows.
+5. Return the result as a JSON array of objects."""
+
+_MAP_INSTRUCTIONS = """You are a database schema mapper. Map the extracted column headers to the correct SQL table columns.
+
+Instructions:
+1. For each extracted header, find the semantically best matching SQL column.
+2. Ignore case differences (e.g. "well" matches "WELL_NAME").
+3. Return a JSON object where keys are the extracted headers and values are the SQL columns.
+4. If no good match exists for a header, do not include it in the JSON."""
+
+# JSON mode means fences should never appear, but strip a fully fenced
+# reply defensively. Anchored so triple-backticks inside values survive —
+# the old blanket str.replace corrupted those.
+_JSON_FENCE = re.compile(r'^\s*```(?:json)?\s*(.+?)\s*```\s*$', re.DOTALL)
+
+def _strip_json_fence(text: str) -> str:
+    m = _JSON_FENCE.match(text)
+    return m.group(1) if m else text.strip()
+
+@lru_cache(maxsize=4)
+def _gemini_model(system_instruction: str = None):
+    """One GenerativeModel per instruction block, built once per process."""
+    return genai.GenerativeModel('gemini-3-flash-preview',
+                                 system_instruction=system_instruction)
+
 def parse_with_gemini(text: str, label: str) -> List[Dict]:
     """
-    Uses Gemini LLM to parse unstructured text into structured JSON 
+    Uses Gemini LLM to parse unstructured text into structured JSON
     matching the target table schema.
     """
     print(f"DEBUG: Parsing text with Gemini for label: {label}")
     table_name = LABEL_TO_TABLE.get(label)
     if not table_name:
         return []
-        
+
+    cache_key, cached = _gemini_cache_get("parse", table_name, text)
+    if cached is not None:
+        print("DEBUG: Gemini parse served from cache")
+        return cached
+
     try:
         # Get schema to guide the LLM
         try:
@@ -150,73 +523,81 @@ def parse_with_gemini(text: str, label: str) -> List[Dict]:
         except Exception:
             columns = "Infer columns from text"
 
-        model = genai.GenerativeModel('gemini-3-flash-preview')
-        
+        model = _gemini_model(_PARSE_INSTRUCTIONS)
+
+        # Per-table static context leads the prompt and the variable text
+        # comes last, keeping the cacheable prefix as long as possible.
+        # JSON output is forced via the generation config instead of
+        # prompt pleading, which also spares the markdown-fence stripping
+        # on the way back.
         prompt = f"""
-        You are a data extraction assistant. Your task is to extract the data exactly as it appears in the provided text, preserving the table structure.
-        
         Context:
         - Target Table: {table_name}
         - Potential Column Names (for reference): {columns}
-        
+
         Text Content:
         {text}
-        
-        Instructions:
-        1. Analyze the text to identify if it contains a table or key-value pairs.
-        2. If it is a table, extract every row and column exactly as they appear.
-        3. Use the headers found in the text as JSON keys. If headers are missing or unclear, use the 'Potential Column Names' to infer the best matching key.
-        4. Do not skip any rows.
-        5. Return the result as a JSON array of objects.
-        6. Output ONLY valid JSON. Do not include markdown formatting (like ```json).
         """
-        
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip().replace("```json", "").replace("```", "")
-        data = json.loads(cleaned_text)
-        return data if isinstance(data, list) else [data]
-        
+
+        response = model.generate_content(
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0,
+            })
+        data = orjson.loads(_strip_json_fence(response.text))
+        data = data if isinstance(data, list) else [data]
+        _gemini_cache_put(cache_key, data)
+        return data
+
     except Exception as e:
         print(f"ERROR: Gemini parsing failed: {e}")
         return []
 
+# Column separator for space-aligned table rows, compiled once rather than
+# per row inside parse_text_manually
+_ROW_SPLIT_RE = re.compile(r'\s{2,}|\t')
+
 def parse_text_manually(text: str) -> List[Dict]:
     """
     Manually parse text into key-value pairs or table rows based on spacing.
     Used when AI extraction is disabled.
     """
     data = []
-    lines = text.split('\n')
     kv_data = {}
     table_rows = []
-    
-    for line in lines:
-        line = line.strip()
-        if not line: continue
-        
+
+    # Single pass over the text: str.partition scans each line once in C
+    # instead of the old "':' in line" probe followed by split
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+
         # Try to parse as key-value pair
-        if ':' in line and len(line) < 100:
-            parts = line.split(':', 1)
-            k = parts[0].strip()
-            v = parts[1].strip()
-            if k and v and len(k) < 50:
-                kv_data[k.lower().replace(" ", "_")] = v
-        else:
-            # Collect lines that might be table rows
-            if len(line) > 5:
-                table_rows.append(line)
-    
+        if len(line) < 100:
+            k, sep, v = line.partition(':')
+            if sep:
+                k = k.strip()
+                v = v.strip()
+                if k and v and len(k) < 50:
+                    kv_data[k.lower().replace(" ", "_")] = v
+                continue
+
+        # Collect lines that might be table rows
+        if len(line) > 5:
+            table_rows.append(line)
+
     if kv_data:
         data.append(kv_data)
-    
-    if table_rows:
-        for row_text in table_rows:
-            # Split by multiple spaces to separate columns
-            cells = [cell.strip() for cell in re.split(r'\s{2,}|\t', row_text) if cell.strip()]
-            if len(cells) >= 2:
-                row_dict = {f"col_{i}": cell for i, cell in enumerate(cells)}
-                data.append(row_dict)
-                
+
+    for row_text in table_rows:
+        # Split by multiple spaces to separate columns
+        cells = [cell.strip() for cell in _ROW_SPLIT_RE.split(row_text) if cell.strip()]
+        if len(cells) >= 2:
+            row_dict = {f"col_{i}": cell for i, cell in enumerate(cells)}
+            data.append(row_dict)
+
     return data
 
 def get_canonical_bbox(
@@ -270,21 +651,39 @@ def get_canonical_bbox(
 
     return (x0, top, x1, bottom)
 
+def _selection_bbox(sel: RegionSelection, width: float, height: float) -> tuple:
+    """Resolves a selection to a clamped (x0, top, x1, bottom) bbox.
+
+    Pixel selections go through get_canonical_bbox; the legacy percentage
+    fallback gets the same clamping here, so all three extraction paths
+    share one definition instead of three slightly different clamp blocks.
+    """
+    if sel.view_width and sel.view_width > 0:
+        return get_canonical_bbox(
+            float(width), float(height),
+            float(sel.view_width), float(sel.view_height),
+            sel.x, sel.y, sel.width, sel.height)
+
+    x0 = max(0.0, min(sel.x_pct * width, width))
+    top = max(0.0, min(sel.y_pct * height, height))
+    x1 = max(x0, min((sel.x_pct + sel.w_pct) * width, width))
+    bottom = max(top, min((sel.y_pct + sel.h_pct) * height, height))
+    return (x0, top, x1, bottom)
+
 def extract_with_ocr(pdf_path: str, sel: RegionSelection) -> List[Dict]:
     """Extract data from PDF using OCR with pytesseract - converts pages to images and applies OCR."""
     data = []
     try:
         print(f"DEBUG: Starting OCR extraction from {pdf_path}")
         
-        # Check if tesseract is available
-        try:
-            pytesseract.get_tesseract_version()
-        except pytesseract.TesseractNotFoundError:
+        # Availability was probed once at startup; get_tesseract_version()
+        # spawns a subprocess per call, which is pure overhead here
+        if not TESSERACT_AVAILABLE:
             print("WARNING: Tesseract not found - OCR extraction disabled, will fall back to pdfplumber")
             return []
         
         # USE PDFPLUMBER FOR CROPPING (Better coordinate handling)
-        with pdfplumber.open(pdf_path) as pdf:
+        with _pdf_handle(pdf_path) as pdf:
             if sel.page_number < 1 or sel.page_number > len(pdf.pages):
                 print(f"DEBUG: Page {sel.page_number} out of range")
                 return []
@@ -293,13 +692,7 @@ def extract_with_ocr(pdf_path: str, sel: RegionSelection) -> List[Dict]:
             width, height = float(page.width), float(page.height)
             
             # Use Canonical Coordinate Transformation
-            if sel.view_width and sel.view_width > 0:
-                bbox = get_canonical_bbox(width, height, float(sel.view_width), float(sel.view_height),
-                                          sel.x, sel.y, sel.width, sel.height)
-            else:
-                # Legacy Percentage Fallback
-                bbox = (sel.x_pct * width, sel.y_pct * height, 
-                        (sel.x_pct + sel.w_pct) * width, (sel.y_pct + sel.h_pct) * height)
+            bbox = _selection_bbox(sel, width, height)
 
             print(f"DEBUG: PDF Dimensions: {width}x{height}")
             print(f"DEBUG: Cropping bbox: {bbox}")
@@ -317,12 +710,8 @@ def extract_with_ocr(pdf_path: str, sel: RegionSelection) -> List[Dict]:
                 # DEBUG: Save crop to verify alignment
                 img.save("DEBUG_CROP.png")
 
-                # --- Advanced Image Preprocessing for OCR ---
-                # 1. Convert to grayscale
-                img = img.convert('L')
-                # 2. Upscale 2x using LANCZOS
-                new_size = (img.width * 2, img.height * 2)
-                img = img.resize(new_size, getattr(Image, 'Resampling', Image).LANCZOS)
+                # Grayscale + upscale-if-small + Otsu binarization
+                img = _preprocess_for_ocr(img)
             except Exception as e:
                 print(f"DEBUG: Error cropping/converting page: {e}")
                 return []
@@ -331,7 +720,7 @@ def extract_with_ocr(pdf_path: str, sel: RegionSelection) -> List[Dict]:
             print("DEBUG: Applying pytesseract OCR to cropped region")
             # Config: OEM 3 (Default), PSM 6 (Block of text), Preserve spacing
             custom_config = r'--oem 3 --psm 6 -c preserve_interword_spaces=1'
-            extracted_text = pytesseract.image_to_string(img, config=custom_config)
+            extracted_text = _ocr_in_strips(img, custom_config)
             
             if not extracted_text or not extracted_text.strip():
                 print("DEBUG: No text extracted from OCR")
@@ -375,24 +764,18 @@ def extract_from_image(image_path: str, sel: RegionSelection, use_raw_headers: b
     try:
         print(f"DEBUG: Starting image OCR extraction from {image_path}")
         
-        # Check if tesseract is available
-        try:
-            pytesseract.get_tesseract_version()
-        except pytesseract.TesseractNotFoundError:
+        # Availability was probed once at startup (see setup_pytesseract)
+        if not TESSERACT_AVAILABLE:
             print("WARNING: Tesseract not found - OCR extraction disabled for images")
             return []
         
+        from PIL import Image
         image = Image.open(image_path)
         width, height = image.size
         
         # Use Canonical Coordinate Transformation
-        if sel.view_width and sel.view_width > 0:
-            bbox = get_canonical_bbox(float(width), float(height), float(sel.view_width), float(sel.view_height),
-                                      sel.x, sel.y, sel.width, sel.height)
-        else:
-            bbox = (sel.x_pct * width, sel.y_pct * height, 
-                    (sel.x_pct + sel.w_pct) * width, (sel.y_pct + sel.h_pct) * height)
-        
+        bbox = _selection_bbox(sel, float(width), float(height))
+
         x0, y0, x1, y1 = bbox
         
         print(f"DEBUG: Image dimensions: {width}x{height}")
@@ -407,18 +790,13 @@ def extract_from_image(image_path: str, sel: RegionSelection, use_raw_headers: b
         # DEBUG: Save crop
         cropped_image.save("DEBUG_CROP.png")
 
-        # --- Advanced Image Preprocessing for OCR ---
-        # 1. Convert to grayscale
-        cropped_image = cropped_image.convert('L')
-        # 2. Upscale 2x using LANCZOS
-        new_size = (cropped_image.width * 2, cropped_image.height * 2)
-        resample_method = getattr(Image, 'Resampling', Image).LANCZOS
-        cropped_image = cropped_image.resize(new_size, resample_method)
+        # Grayscale + upscale-if-small + Otsu binarization
+        cropped_image = _preprocess_for_ocr(cropped_image)
         
-        # Run pytesseract OCR on the cropped image
+        # Run pytesseract OCR on the cropped image (cached by pixel hash)
         print("DEBUG: Applying pytesseract OCR to image region")
         custom_config = r'--oem 3 --psm 6 -c preserve_interword_spaces=1'
-        extracted_text = pytesseract.image_to_string(cropped_image, config=custom_config)
+        extracted_text = _ocr_in_strips(cropped_image, custom_config)
         
         if not extracted_text or not extracted_text.strip():
             print("DEBUG: No text extracted from OCR")
@@ -460,19 +838,15 @@ def extract_from_image(image_path: str, sel: RegionSelection, use_raw_headers: b
 def extract_from_region(pdf_path: str, sel: RegionSelection, use_raw_headers: bool = False) -> List[Dict]:
     """Extract tables from ONLY the cropped region you selected."""
     data = []
-    with pdfplumber.open(pdf_path) as pdf:
+    # Cached handle: do NOT close it here, later selections reuse it
+    with _pdf_handle(pdf_path) as pdf:
         page = pdf.pages[sel.page_number - 1]
         width, height = page.width, page.height
         
         print(f"DEBUG: Page dimensions: {width}x{height}")
         
         # Use Canonical Coordinate Transformation
-        if sel.view_width and sel.view_width > 0:
-            bbox = get_canonical_bbox(float(width), float(height), float(sel.view_width), float(sel.view_height),
-                                      sel.x, sel.y, sel.width, sel.height)
-        else:
-            bbox = (sel.x_pct * width, sel.y_pct * height, 
-                    (sel.x_pct + sel.w_pct) * width, (sel.y_pct + sel.h_pct) * height)
+        bbox = _selection_bbox(sel, width, height)
 
         x0, top, x1, bottom = bbox
         print(f"DEBUG: Cropped bbox (clamped): ({x0}, {top}, {x1}, {bottom})")
@@ -480,7 +854,14 @@ def extract_from_region(pdf_path: str, sel: RegionSelection, use_raw_headers: bo
         if x1 - x0 <= 1 or bottom - top <= 1:
             print("DEBUG: Selection too small")
             return []
-        
+
+        # Fast probe: if PDFium sees no embedded text in the region, the
+        # pdfplumber table pass and text fallback below cannot find any
+        # either — bail out now so the caller moves straight on to OCR
+        if not _region_has_text(pdf_path, sel.page_number, bbox, height):
+            print("DEBUG: No embedded text in region (pdfium probe), skipping native extraction")
+            return []
+
         # Crop page and extract tables ONLY from that region
         cropped = page.crop(bbox)
         
@@ -492,80 +873,76 @@ def extract_from_region(pdf_path: str, sel: RegionSelection, use_raw_headers: bo
             try:
                 print("DEBUG: Attempting specialized deterministic extraction for CASING")
                 words = cropped.extract_words(use_text_flow=True, keep_blank_chars=False)
-                
-                if words:
+
+                # expected number of columns
+                NUM_COLS = 9
+
+                if len(words) >= NUM_COLS:
+                    # One coordinate array instead of per-word dict walks:
+                    # every step below is a NumPy pass over these columns
+                    arr = np.array([(w["x0"], w["x1"], w["top"], w["bottom"])
+                                    for w in words])
+                    texts = [w["text"] for w in words]
+                    cx = (arr[:, 0] + arr[:, 1]) * 0.5
+
                     # 🔧 Step 1: Lock column boundaries ONCE
-                    # sort words by x center
-                    words_sorted = sorted(words, key=lambda w: (w["x0"] + w["x1"]) / 2)
-                    
-                    # expected number of columns
-                    NUM_COLS = 9
-                    
-                    if len(words_sorted) >= NUM_COLS:
-                        # split into 9 roughly equal vertical slices
-                        columns = [[] for _ in range(NUM_COLS)]
-                        
-                        for i, w in enumerate(words_sorted):
-                            columns[i * NUM_COLS // len(words_sorted)].append(w)
-                        
-                        # compute column boundaries
-                        col_bounds = []
-                        for col in columns:
-                            if col:
-                                xs = [w["x0"] for w in col] + [w["x1"] for w in col]
-                                col_bounds.append((min(xs), max(xs)))
-                            else:
-                                col_bounds.append((-1, -1))
-
-                        # 🔧 Step 2: Assign every word to EXACTLY one column
-                        def assign_column(word, col_bounds):
-                            cx = (word["x0"] + word["x1"]) / 2
-                            for i, (x0, x1) in enumerate(col_bounds):
-                                if x0 == -1: continue
-                                if x0 - 2 <= cx <= x1 + 2:
-                                    return i
-                            return None
-
-                        for w in words:
-                            w["col"] = assign_column(w, col_bounds)
-                            
-                        # 🔧 Step 3: Build rows using vertical overlap
-                        def same_row(w1, w2, tol=4):
-                            return not (
-                                w1["bottom"] < w2["top"] - tol or
-                                w2["bottom"] < w1["top"] - tol
-                            )
-
-                        rows = []
-                        # Sort by top to process top-down
-                        for w in sorted(words, key=lambda w: w["top"]):
-                            placed = False
-                            for row in rows:
-                                if same_row(w, row[0]):
-                                    row.append(w)
-                                    placed = True
-                                    break
-                            if not placed:
-                                rows.append([w])
-                                
-                        # 🔧 Step 4: Reconstruct rows column-by-column
-                        # Sort rows by vertical position
-                        rows.sort(key=lambda r: r[0]["top"])
-                        
-                        for row in rows:
-                            row_cells = [""] * NUM_COLS
-                            for col in range(NUM_COLS):
-                                cell_words = [w for w in row if w.get("col") == col]
-                                # Sort words in cell by x position
-                                cell_words.sort(key=lambda w: w["x0"])
-                                row_cells[col] = " ".join([w["text"] for w in cell_words]).strip()
-                            table_data.append(row_cells)
-                        
-                        if table_data:
-                            tables = [table_data]
-                            print(f"DEBUG: Deterministic extraction found table with {len(table_data)} rows")
+                    # Split the x-sorted words into 9 equal-count slices and
+                    # place a column edge at the midpoint between adjacent
+                    # slices' extents
+                    x_order = np.argsort(cx, kind="stable")
+                    slice_of = np.arange(len(words)) * NUM_COLS // len(words)
+                    col_edges = np.empty(NUM_COLS - 1)
+                    prev = 0.0
+                    for c in range(NUM_COLS - 1):
+                        left = x_order[slice_of == c]
+                        right = x_order[slice_of == c + 1]
+                        if len(left) and len(right):
+                            prev = (arr[left, 1].max() + arr[right, 0].min()) * 0.5
+                        col_edges[c] = prev
+
+                    # 🔧 Step 2: Assign every word to EXACTLY one column —
+                    # a single binary search against the locked edges
+                    cols = np.searchsorted(col_edges, cx)
+
+                    # 🔧 Step 3: Build rows with a top-down sweep: a word
+                    # opens a new row when it starts below everything seen
+                    # so far (plus tolerance), otherwise it joins the
+                    # current one — linear, no pairwise overlap checks
+                    t_order = np.argsort(arr[:, 2], kind="stable")
+                    run_bottom = np.maximum.accumulate(arr[t_order, 3])
+                    breaks = arr[t_order[1:], 2] > run_bottom[:-1] + 4
+                    row_ids = np.concatenate(([0], np.cumsum(breaks)))
+
+                    # 🔧 Step 4: Reconstruct rows column-by-column
+                    table_data = []
+                    for r in range(int(row_ids[-1]) + 1):
+                        members = t_order[row_ids == r]
+                        members = members[np.argsort(arr[members, 0],
+                                                     kind="stable")]
+                        row_cells = [""] * NUM_COLS
+                        for i in members:
+                            c = int(cols[i])
+                            cell = row_cells[c]
+                            row_cells[c] = (cell + " " + texts[i]) if cell else texts[i]
+                        table_data.append(row_cells)
+
+                    # Guard: the equal-count slicing above assumes the
+                    # region really is a ~9-column grid. On narrower
+                    # layouts (the 4-column sample report) or prose the
+                    # words scatter thinly across the forced bins — most
+                    # cells land empty and real values get dropped. Only
+                    # trust the result when the grid is mostly filled;
+                    # otherwise fall through to the generic strategies.
+                    filled = sum(1 for row in table_data for cell in row if cell)
+                    fill_ratio = filled / (len(table_data) * NUM_COLS) if table_data else 0.0
+                    if table_data and fill_ratio >= 0.5:
+                        tables = [table_data]
+                        print(f"DEBUG: Deterministic extraction found table with {len(table_data)} rows")
                     else:
-                        print("DEBUG: Not enough words for column estimation")
+                        print(f"DEBUG: Deterministic grid mostly empty "
+                              f"(fill {fill_ratio:.2f}), using fallback strategies")
+                else:
+                    print("DEBUG: Not enough words for column estimation")
             except Exception as e:
                 print(f"DEBUG: Deterministic extraction failed: {e}")
                 import traceback
@@ -574,14 +951,29 @@ def extract_from_region(pdf_path: str, sel: RegionSelection, use_raw_headers: bo
         # 🎯 STRATEGY 2: Standard pdfplumber extraction (Fallback)
         if not tables:
             try:
-                tables = cropped.extract_tables(table_settings={
-                    "vertical_strategy": "text",
-                    "horizontal_strategy": "text",
-                    "snap_tolerance": 5,
-                    "min_words_vertical": 2,
-                    "intersection_x_tolerance": 10
-                })
-                print(f"DEBUG: Found {len(tables) if tables else 0} tables in cropped region")
+                # Ruled tables (the PDF draws its own grid) segment faster
+                # and more reliably with the line-based strategy, which
+                # skips word-alignment clustering entirely; keep the text
+                # strategy for unruled layouts. cropped.edges covers both
+                # line objects and decomposed rect borders.
+                if len(cropped.edges) >= 4:
+                    settings = {
+                        "vertical_strategy": "lines",
+                        "horizontal_strategy": "lines",
+                        "snap_tolerance": 3,
+                        "intersection_tolerance": 3
+                    }
+                else:
+                    settings = {
+                        "vertical_strategy": "text",
+                        "horizontal_strategy": "text",
+                        "snap_tolerance": 5,
+                        "min_words_vertical": 2,
+                        "intersection_x_tolerance": 10
+                    }
+                tables = cropped.extract_tables(table_settings=settings)
+                print(f"DEBUG: Found {len(tables) if tables else 0} tables in cropped region "
+                      f"({settings['vertical_strategy']} strategy)")
             except Exception as e:
                 print(f"DEBUG: Error extracting tables: {e}")
                 tables = []
@@ -624,8 +1016,15 @@ def extract_from_region(pdf_path: str, sel: RegionSelection, use_raw_headers: bo
         
         # Fallback to text
         print("DEBUG: No tables in cropped region, trying text extraction")
-        # layout=True preserves visual spacing better, crucial for regex splitting
-        text = cropped.extract_text(layout=True)
+        if sel.use_ai:
+            # Gemini doesn't depend on column alignment, so take the text
+            # from PDFium — sub-ms against pdfminer's full layout pass
+            text = _pdfium_region_text(pdf_path, sel.page_number, bbox, height)
+            if text is None or not text.strip():
+                text = cropped.extract_text(layout=True)
+        else:
+            # layout=True preserves visual spacing better, crucial for regex splitting
+            text = cropped.extract_text(layout=True)
         
         if text and text.strip():
             if sel.use_ai:
@@ -654,10 +1053,10 @@ def extract_from_region(pdf_path: str, sel: RegionSelection, use_raw_headers: bo
     return data
 
 # System columns to ignore during validation/display so we don't flag them as missing
-IGNORED_COLUMNS = {
-    "ID", "MODEL", "INSERT_DATE", "MATCH_PERCENT", 
+IGNORED_COLUMNS = frozenset({
+    "ID", "MODEL", "INSERT_DATE", "MATCH_PERCENT",
     "VECTOR_IDS", "PAGE_NUMBERS", "MATCH_ID"
-}
+})
 
 def map_columns_with_gemini(unmapped_keys: List[str], schema_columns: List[str], table_name: str) -> Dict[str, str]:
     """
@@ -665,56 +1064,127 @@ def map_columns_with_gemini(unmapped_keys: List[str], schema_columns: List[str],
     """
     if not unmapped_keys or not schema_columns:
         return {}
-    
+
+    cache_key, cached = _gemini_cache_get(
+        "map", table_name, "\x1f".join(sorted(unmapped_keys)))
+    if cached is not None:
+        return cached
+
     print(f"DEBUG: Asking Gemini to map columns for {table_name}: {unmapped_keys}")
-    
+
     try:
-        model = genai.GenerativeModel('gemini-3-flash-preview')
-        
+        model = _gemini_model(_MAP_INSTRUCTIONS)
+
+        # Static-first prompt ordering + JSON mode, same rationale as
+        # parse_with_gemini
         prompt = f"""
-        You are a database schema mapper. Map the extracted column headers to the correct SQL table columns.
-        
         Target Table: {table_name}
         Available SQL Columns: {", ".join(schema_columns)}
-        
+
         Extracted Headers to Map: {", ".join(unmapped_keys)}
-        
-        Instructions:
-        1. For each extracted header, find the semantically best matching SQL column.
-        2. Ignore case differences (e.g. "well" matches "WELL_NAME").
-        3. Return a JSON object where keys are the extracted headers and values are the SQL columns.
-        4. If no good match exists for a header, do not include it in the JSON.
-        5. Output ONLY valid JSON.
         """
-        
-        response = model.generate_content(prompt)
-        cleaned_text = response.text.strip().replace("```json", "").replace("```", "")
-        mapping = json.loads(cleaned_text)
-        return mapping if isinstance(mapping, dict) else {}
+
+        response = model.generate_content(
+            prompt,
+            generation_config={
+                "response_mime_type": "application/json",
+                "temperature": 0,
+            })
+        mapping = orjson.loads(_strip_json_fence(response.text))
+        mapping = mapping if isinstance(mapping, dict) else {}
+        _gemini_cache_put(cache_key, mapping)
+        return mapping
     except Exception as e:
         print(f"ERROR: Gemini column mapping failed: {e}")
         return {}
 
+# Deletes every non-alphanumeric Latin-1 codepoint in one C-level pass;
+# anything beyond Latin-1 is rare in extracted headers and handled by the
+# fallback inside normalize_key
+_NORM_DELETE = {c: None for c in range(256) if not chr(c).isalnum()}
+
+@lru_cache(maxsize=4096)
+def normalize_key(k):
+    """Normalizes a header for robust matching (e.g. "Field:" -> "FIELD")."""
+    # Remove all non-alphanumeric characters for stricter matching
+    s = str(k).upper().translate(_NORM_DELETE)
+    if s and not s.isalnum():
+        s = "".join(c for c in s if c.isalnum())
+    return s
+
+
+@lru_cache(maxsize=32)
+def _schema_bundle(table_name: str):
+    """Schema plus every derived per-table structure, computed once.
+
+    Bundles the column map, the display columns (system columns filtered
+    out), the exact normalized->original header map, and the fuzzy-match
+    list ordered longest-first so the scan prefers the most specific column
+    name. Callers get a dict lookup instead of rebuilding these per request.
+    """
+    schema = get_table_schema(table_name)
+    return SimpleNamespace(
+        schema=schema,
+        display_columns=tuple(
+            k for k in schema.keys() if k.upper() not in IGNORED_COLUMNS),
+        schema_map={normalize_key(k): k for k in schema.keys()},
+        sql_cols_normalized=tuple(sorted(
+            ((normalize_key(k), k) for k in schema.keys()),
+            key=lambda pair: -len(pair[0]))),
+    )
+
+
+@lru_cache(maxsize=8192)
+def _resolve_column(table_name: str, key: str):
+    """Heuristic header -> SQL column resolution (exact, substring, pattern).
+
+    Memoized per (table, header): the same headers come back on every
+    re-extraction of a region, and the substring scan over the schema is
+    the hot part. Returns None when only the LLM could resolve it.
+    """
+    bundle = _schema_bundle(table_name)
+    schema = bundle.schema
+    norm_key = normalize_key(key)
+
+    # 1. Exact Normalized Match
+    real_col_name = bundle.schema_map.get(norm_key)
+
+    # 2. Fuzzy Match (Substring)
+    if not real_col_name:
+        for sql_norm, sql_orig in bundle.sql_cols_normalized:
+            if sql_norm in norm_key and len(sql_norm) > 2:
+                real_col_name = sql_orig
+                break
+
+    # 3. Smart semantic matching (Hardcoded patterns)
+    if not real_col_name:
+        key_lower = key.lower()
+        if "type" in key_lower and ("casing" in schema or any("CASING_TYPE" in c for c in schema)):
+            real_col_name = "CASING_TYPE"
+        elif ("depth" in key_lower or "bottom" in key_lower) and "CASING_BOTTOM" in schema:
+            real_col_name = "CASING_BOTTOM"
+        elif ("top" in key_lower) and "CASING_TOP" in schema:
+            real_col_name = "CASING_TOP"
+        elif ("diameter" in key_lower or "od" in key_lower) and "OUTER_DIAMETER" in schema:
+            real_col_name = "OUTER_DIAMETER"
+        elif ("length" in key_lower or "grade" in key_lower) and "STEEL_GRADE" in schema:
+            real_col_name = "STEEL_GRADE"
+        elif ("material" in key_lower or "grade" in key_lower) and "MATERIAL_TYPE" in schema:
+            real_col_name = "MATERIAL_TYPE"
+
+    return real_col_name
+
+
 def validate_data(data: List[Dict], table_name: str):
     try:
-        schema = get_table_schema(table_name)
+        bundle = _schema_bundle(table_name)
     except ValueError:
         return {"error": f"Table {table_name} not defined in SQL."}
 
     validated_rows = []
-    
-    # Helper to normalize keys for robust matching (remove spaces, underscores, dots)
-    def normalize_key(k):
-        # Remove all non-alphanumeric characters for stricter matching (e.g. "Field:" -> "FIELD")
-        return "".join(c for c in str(k).upper() if c.isalnum())
-
-    # Create a map of the schema: NORMALIZED -> Original
-    schema_map = {normalize_key(k): k for k in schema.keys()}
-    # Also create a list for fuzzy substring matching
-    sql_cols_normalized = [(normalize_key(k), k) for k in schema.keys()]
-    
-    # Filter schema for display/validation (exclude system columns)
-    display_columns = [k for k in schema.keys() if k.upper() not in IGNORED_COLUMNS]
+
+    schema = bundle.schema
+    display_columns = bundle.display_columns
     
     # --- PHASE 1: Identify all unique keys in the data ---
     all_keys = set()
@@ -723,46 +1193,36 @@ def validate_data(data: List[Dict], table_name: str):
             if not k.startswith("_"):
                 all_keys.add(k)
     
+    # --- Fast path: headers already ARE the SQL columns ---
+    # The common case for PDFs filled from /generate-template. No fuzzy
+    # matching, LLM pass or pandas reshaping is needed — just reindex each
+    # row to the display columns and flag the empty ones.
+    if all_keys <= schema.keys():
+        for row in data:
+            if "_warning" in row or "_error" in row:
+                clean_row = row.copy()
+                clean_row["_status"] = "WARNING" if "_warning" in row else "ERROR"
+            else:
+                clean_row = {k: row.get(k) for k in display_columns}
+                has_data = any(v is not None for k, v in row.items()
+                               if not k.startswith("_"))
+                clean_row["_status"] = "VALID" if has_data else "WARNING"
+                clean_row["_errors"] = "" if has_data else "No data extracted"
+            validated_rows.append(clean_row)
+        return {"schema": display_columns, "data": validated_rows}
+
     # --- PHASE 2: Build Column Mapping (Heuristic + LLM) ---
     key_mapping = {}
     unmapped_keys = []
-    
+
     for key in all_keys:
-        norm_key = normalize_key(key)
-        real_col_name = None
-        
-        # 1. Exact Normalized Match
-        if norm_key in schema_map:
-            real_col_name = schema_map[norm_key]
-        
-        # 2. Fuzzy Match (Substring)
-        if not real_col_name:
-            for sql_norm, sql_orig in sql_cols_normalized:
-                if sql_norm in norm_key and len(sql_norm) > 2: 
-                    real_col_name = sql_orig
-                    break
-        
-        # 3. Smart semantic matching (Hardcoded patterns)
-        if not real_col_name:
-            key_lower = key.lower()
-            if "type" in key_lower and ("casing" in schema.keys() or any("CASING_TYPE" in c for c in schema.keys())):
-                real_col_name = "CASING_TYPE"
-            elif ("depth" in key_lower or "bottom" in key_lower) and "CASING_BOTTOM" in schema.keys():
-                real_col_name = "CASING_BOTTOM"
-            elif ("top" in key_lower) and "CASING_TOP" in schema.keys():
-                real_col_name = "CASING_TOP"
-            elif ("diameter" in key_lower or "od" in key_lower) and "OUTER_DIAMETER" in schema.keys():
-                real_col_name = "OUTER_DIAMETER"
-            elif ("length" in key_lower or "grade" in key_lower) and "STEEL_GRADE" in schema.keys():
-                real_col_name = "STEEL_GRADE"
-            elif ("material" in key_lower or "grade" in key_lower) and "MATERIAL_TYPE" in schema.keys():
-                real_col_name = "MATERIAL_TYPE"
-        
+        real_col_name = _resolve_column(table_name, key)
         if real_col_name:
             key_mapping[key] = real_col_name
         else:
             unmapped_keys.append(key)
-            
+
+
     # --- PHASE 3: LLM Fallback for Unmapped Keys ---
     if unmapped_keys:
         llm_mapping = map_columns_with_gemini(unmapped_keys, list(schema.keys()), table_name)
@@ -771,65 +1231,235 @@ def validate_data(data: List[Dict], table_name: str):
                 key_mapping[k] = v
                 print(f"DEBUG: LLM mapped '{k}' -> '{v}'")
 
-    # --- PHASE 4: Apply Mapping to Rows ---
-    for row in data:
-        row_status = "VALID"
-        errors = []
-        clean_row = {}
-        
-        # Skip rows with only warnings or errors
+    # --- PHASE 4: Apply Mapping to Rows (vectorized) ---
+    # Special warning/error rows pass through untouched; everything else is
+    # renamed and reindexed in one pandas pass instead of a per-row Python
+    # dict loop over every key of every row.
+    validated_rows = [None] * len(data)
+    normal_indices = []
+    normal_rows = []
+    for i, row in enumerate(data):
         if "_warning" in row or "_error" in row:
-            # Keep these special rows as-is
             clean_row = row.copy()
             clean_row["_status"] = "WARNING" if "_warning" in row else "ERROR"
-            validated_rows.append(clean_row)
-            continue
-        
-        for key, val in row.items():
-            if key.startswith("_"): continue # Skip internal flags
-            
-            real_col_name = key_mapping.get(key)
-            
-            if real_col_name:
-                clean_row[real_col_name] = val
-            else:
-                errors.append(f"Unknown column: {key}")
+            validated_rows[i] = clean_row
+        else:
+            normal_indices.append(i)
+            normal_rows.append(row)
+
+    if normal_rows:
+        df = pd.DataFrame(normal_rows)
+        df = df.drop(columns=[c for c in df.columns if c.startswith("_")],
+                     errors='ignore')
+
+        known_cols = [c for c in df.columns if c in key_mapping]
+        unknown_cols = [c for c in df.columns if c not in key_mapping]
+
+        mapped = df[known_cols].rename(columns=key_mapping)
+        # If two extracted headers map to the same SQL column, keep the
+        # right-most one (matches the old per-row dict-overwrite behavior)
+        if mapped.columns.duplicated().any():
+            mapped = mapped.loc[:, ~mapped.columns.duplicated(keep='last')]
+
+        has_data = (mapped.notna().any(axis=1).to_numpy()
+                    if not mapped.empty else np.zeros(len(df), dtype=bool))
+        # Missing columns become None (not NaN) so JSON serializes as null
+        mapped = mapped.reindex(columns=list(display_columns))
+        mapped = mapped.astype(object).where(pd.notna(mapped), None)
+
+        # Unknown columns only count against rows that actually hold a value
+        unknown_mask = (df[unknown_cols].notna().to_numpy()
+                        if unknown_cols else None)
+
+        for pos, clean_row in enumerate(mapped.to_dict(orient='records')):
+            errors = []
+            if unknown_mask is not None:
+                errors = [f"Unknown column: {c}" for c, flagged
+                          in zip(unknown_cols, unknown_mask[pos]) if flagged]
+            if errors:
                 row_status = "INVALID"
-        
-        # 2. Only mark as INVALID if we found actual data but have unknown columns
-        # If we have data that maps to known columns, keep it as VALID
-        # Missing columns should just be null
-        if not clean_row and not errors:
-            # Empty row
-            row_status = "WARNING"
-            errors.append("No data extracted")
-        
-        # Fill in missing columns with None
-        for col in display_columns:
-            if col not in clean_row:
-                clean_row[col] = None
-        
-        clean_row["_status"] = row_status
-        clean_row["_errors"] = "; ".join(errors) if errors else ""
-        validated_rows.append(clean_row)
-        
+            elif not has_data[pos]:
+                row_status = "WARNING"
+                errors.append("No data extracted")
+            else:
+                row_status = "VALID"
+
+            clean_row["_status"] = row_status
+            clean_row["_errors"] = "; ".join(errors)
+            validated_rows[normal_indices[pos]] = clean_row
+
     return {"schema": display_columns, "data": validated_rows}
 
+def _run_extraction(file_path: str, sel_obj: RegionSelection, is_image: bool) -> List[Dict]:
+    """Runs the full native -> OCR extraction cascade for one selection.
+
+    Synchronous on purpose: the endpoint dispatches it through
+    asyncio.to_thread so pdfplumber/tesseract work doesn't block the
+    event loop.
+    """
+    if is_image:
+        return extract_from_image(file_path, sel_obj, use_raw_headers=True)
+
+    # Try native PDF extraction first (Best for tables in digital PDFs)
+    print(f"DEBUG: Attempting native pdfplumber extraction")
+    raw_data = extract_from_region(file_path, sel_obj, use_raw_headers=True)
+
+    # Evaluate Native Result
+    native_quality_low = False
+    if not raw_data or len(raw_data) == 0:
+        native_quality_low = True
+    elif "_warning" in raw_data[0] or "_error" in raw_data[0]:
+        # Fix 2: Only OCR if PDF has NO TEXT LAYER
+        # If we have substantial text, assume digital PDF and accept the text result (don't OCR)
+        raw_text = raw_data[0].get("raw_text", "")
+        if len(raw_text.strip()) > 50:
+            native_quality_low = False
+        else:
+            native_quality_low = True
+    elif len(raw_data[0].keys()) < 2:
+        # If we only found 1 column, native extraction probably failed to split columns
+        native_quality_low = True
+
+    # Fallback to OCR if native extraction yields nothing
+    if not raw_data or len(raw_data) == 0:
+        print(f"DEBUG: Native extraction returned no data, trying OCR")
+        raw_data = extract_with_ocr(file_path, sel_obj)
+    # Fallback to OCR if native extraction was poor
+    if native_quality_low:
+        print(f"DEBUG: Native extraction quality low, trying OCR")
+        ocr_data = extract_with_ocr(file_path, sel_obj)
+        # Use OCR data if it found something
+        if ocr_data and len(ocr_data) > 0:
+            raw_data = ocr_data
+
+    return raw_data
+
+_IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.tiff', '.tif', '.webp', '.bmp', '.gif')
+
+def _bulk_insert(df: pd.DataFrame, table_name: str):
+    """Appends a DataFrame using the fastest path the dialect offers.
+
+    Postgres gets COPY FROM STDIN — one round trip with server-side CSV
+    parsing, roughly an order of magnitude faster than multi-row INSERT.
+    The SQLite dev database keeps to_sql(method='multi'), chunked so a
+    single statement stays under the bound-parameter ceiling.
+    """
+    # table_name comes in from the request body; only the known WCR
+    # tables are valid targets
+    if table_name not in LABEL_TO_TABLE.values():
+        raise ValueError(f"Unknown table: {table_name}")
+    if engine.dialect.name == "postgresql":
+        import io
+        from psycopg2 import sql
+        buf = io.StringIO()
+        df.to_csv(buf, index=False, header=False)
+        buf.seek(0)
+        copy_sql = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT CSV, NULL '')").format(
+            sql.Identifier(table_name),
+            sql.SQL(", ").join(sql.Identifier(c) for c in df.columns))
+        raw = engine.raw_connection()
+        try:
+            with raw.cursor() as cur:
+                cur.copy_expert(copy_sql, buf)
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+    else:
+        df.to_sql(table_name, engine, if_exists='append', index=False,
+                  method='multi', chunksize=500)
+
+def _batch_worker_init():
+    """Runs once in each batch worker process.
+
+    Connections forked from the parent must not be shared; dispose the
+    pool (without closing the parent's sockets) so the child opens its
+    own on first use. Then pay the heavy costs up front — pdfminer's
+    module init and the first DB connection — so they land at pool
+    startup instead of on the first region.
+    """
+    engine.dispose(close=False)
+    import pdfplumber  # noqa: F401
+    try:
+        engine.connect().close()
+    except Exception:
+        pass
+
+def _extract_one(filename: str, sel_dict: dict) -> dict:
+    """Picklable worker for /extract-batch: one region through the full
+    extract + validate pipeline, results keyed by label."""
+    sel_obj = RegionSelection(**sel_dict)
+    safe_filename = os.path.basename(filename)
+    file_path = os.path.join(UPLOAD_DIR, safe_filename)
+
+    table_name = LABEL_TO_TABLE.get(sel_obj.label)
+    if not table_name:
+        return {"label": sel_obj.label, "error": "Label not mapped to SQL table"}
+
+    is_image = safe_filename.lower().endswith(_IMAGE_SUFFIXES)
+    raw_data = _run_extraction(file_path, sel_obj, is_image)
+    if not raw_data:
+        return {"label": sel_obj.label, "raw_data": [], "sql_data": [], "schema": []}
+
+    result = validate_data(raw_data, table_name)
+    if "error" in result:
+        return {"label": sel_obj.label, "error": result["error"]}
+    return {
+        "label": sel_obj.label,
+        "raw_data": raw_data,
+        "sql_data": result["data"],
+        "schema": result["schema"],
+    }
+
 # --- ENDPOINTS ---
 
 @app.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    return {"filename": file.filename}
+    # Stream the upload asynchronously in 1 MB chunks: the old synchronous
+    # copy blocked the event loop for the whole file, serializing every
+    # concurrent upload/extract behind it. Hash while streaming so the
+    # blob can be stored content-addressed below.
+    hasher = hashlib.sha256()
+    tmp_path = path + ".part"
+    async with aiofiles.open(tmp_path, "wb") as out:
+        while chunk := await file.read(1024 * 1024):
+            hasher.update(chunk)
+            await out.write(chunk)
+    digest = hasher.hexdigest()
+
+    # Content-addressed store: re-uploading the same PDF (constant while
+    # iterating on selections) dedupes on disk, and because the visible
+    # filename is hard-linked to the blob, an identical re-upload keeps
+    # the same inode and mtime — so cached parsed handles stay valid
+    # instead of missing on a rewritten file.
+    blob_dir = os.path.join(UPLOAD_DIR, "sha256", digest[:2])
+    os.makedirs(blob_dir, exist_ok=True)
+    blob_path = os.path.join(blob_dir, digest)
+    if os.path.exists(blob_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, blob_path)
+
+    if os.path.exists(path):
+        if os.path.samefile(path, blob_path):
+            return {"filename": file.filename, "content_id": digest}
+        os.remove(path)
+    try:
+        os.link(blob_path, path)
+    except OSError:
+        # Filesystem without hardlinks: fall back to a plain copy
+        shutil.copyfile(blob_path, path)
+    return {"filename": file.filename, "content_id": digest}
 
 @app.post("/extract")
 async def extract(
     filename: str = Form(...),
     selection: str = Form(...)
 ):
-    sel_dict = json.loads(selection)
+    sel_dict = orjson.loads(selection)
     sel_obj = RegionSelection(**sel_dict)
     
     # Security: Ensure filename is just the name, not a path
@@ -841,44 +1471,12 @@ async def extract(
         raise HTTPException(status_code=400, detail="Label not mapped to SQL table")
     
     # Determine if file is an image or PDF
-    is_image = safe_filename.lower().endswith(('.png', '.jpg', '.jpeg', '.tiff', '.tif', '.webp', '.bmp', '.gif'))
-    
-    # Extract based on file type
-    if is_image:
-        raw_data = extract_from_image(file_path, sel_obj, use_raw_headers=True)
-    else:
-        # Try native PDF extraction first (Best for tables in digital PDFs)
-        print(f"DEBUG: Attempting native pdfplumber extraction")
-        raw_data = extract_from_region(file_path, sel_obj, use_raw_headers=True)
+    is_image = safe_filename.lower().endswith(_IMAGE_SUFFIXES)
+
+    # Off-load the blocking pdfplumber/tesseract pipeline so concurrent
+    # requests aren't serialized behind this one
+    raw_data = await asyncio.to_thread(_run_extraction, file_path, sel_obj, is_image)
 
-        # Evaluate Native Result
-        native_quality_low = False
-        if not raw_data or len(raw_data) == 0:
-            native_quality_low = True
-        elif "_warning" in raw_data[0] or "_error" in raw_data[0]:
-            # Fix 2: Only OCR if PDF has NO TEXT LAYER
-            # If we have substantial text, assume digital PDF and accept the text result (don't OCR)
-            raw_text = raw_data[0].get("raw_text", "")
-            if len(raw_text.strip()) > 50:
-                native_quality_low = False
-            else:
-                native_quality_low = True
-        elif len(raw_data[0].keys()) < 2:
-            # If we only found 1 column, native extraction probably failed to split columns
-            native_quality_low = True
-        
-        # Fallback to OCR if native extraction yields nothing
-        if not raw_data or len(raw_data) == 0:
-            print(f"DEBUG: Native extraction returned no data, trying OCR")
-            raw_data = extract_with_ocr(file_path, sel_obj)
-        # Fallback to OCR if native extraction was poor
-        if native_quality_low:
-            print(f"DEBUG: Native extraction quality low, trying OCR")
-            ocr_data = extract_with_ocr(file_path, sel_obj)
-            # Use OCR data if it found something
-            if ocr_data and len(ocr_data) > 0:
-                raw_data = ocr_data
-    
     if not raw_data:
         msg = "No data found in selection"
         if not TESSERACT_AVAILABLE:
@@ -886,8 +1484,8 @@ async def extract(
         return {"message": msg, "raw_data": [], "sql_data": [], "schema": []}
 
     # Validate
-    result = validate_data(raw_data, table_name)
-    
+    result = await asyncio.to_thread(validate_data, raw_data, table_name)
+
     if "error" in result:
         raise HTTPException(status_code=500, detail=result["error"])
     
@@ -897,16 +1495,43 @@ async def extract(
         "schema": result["schema"]
     }
 
-@app.post("/check-existence")
-async def check_existence(
-    data: str = Form(...),
-    table_name: str = Form(...)
+@app.post("/extract-batch")
+async def extract_batch(
+    filename: str = Form(...),
+    selections: str = Form(...)
 ):
+    """Extracts several regions of one report in parallel.
+
+    A typical well-completion report means one selection per label
+    (CASING, LOGS, DIRSRVY, ...). pdfminer parsing is Python-CPU-bound
+    and holds the GIL, so fan the regions out over processes rather than
+    threads; each worker re-parses only its own pages.
+    """
+    sel_dicts = orjson.loads(selections)
+    if not isinstance(sel_dicts, list) or not sel_dicts:
+        raise HTTPException(status_code=400, detail="selections must be a non-empty JSON array")
+
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*[
+        loop.run_in_executor(app.state.pool, _extract_one, filename, s)
+        for s in sel_dicts])
+    return {"results": results}
+
+# Short-TTL response cache for /check-existence, keyed on a digest of the
+# raw payload. Same LRU shape as _GEMINI_CACHE; the TTL bounds staleness
+# from writers outside this process (other workers, direct DB access).
+_EXIST_CACHE = OrderedDict()
+_EXIST_CACHE_MAX = 512
+_EXIST_CACHE_TTL = 300.0  # seconds
+_EXIST_CACHE_LOCK = threading.Lock()
+
+def _check_existence_sync(rows: List[Dict], table_name: str) -> Dict:
+    """Blocking body of /check-existence, run via asyncio.to_thread.
+
+    Touches the DB (and potentially Gemini through validate_data), so it
+    must stay off the event loop or one slow lookup stalls every client.
+    """
     try:
-        rows = json.loads(data)
-        if not rows:
-            return {"exists": [], "new": []}
-            
         # Convert to DataFrame for easier handling
         input_df = pd.DataFrame(rows)
         # Drop internal columns
@@ -915,65 +1540,104 @@ async def check_existence(
         if input_df.empty:
              return {"exists": [], "new": rows}
 
-        with engine.connect() as conn:
-            # Check if table exists
-            inspector = inspect(engine)
-            if not inspector.has_table(table_name):
-                return {"exists": [], "new": rows}
-
-            # Read existing data
-            # Optimization: If UWI is present, filter by UWI to reduce data load
-            query = f"SELECT * FROM {table_name}"
-            if "UWI" in input_df.columns:
-                unique_uwis = [str(u) for u in input_df["UWI"].unique() if u]
-                if unique_uwis:
-                    uwis_str = "', '".join(unique_uwis)
-                    query += f" WHERE \"UWI\" IN ('{uwis_str}')"
-            
-            existing_df = pd.read_sql(query, conn)
-            
-        if existing_df.empty:
+        # Check if table exists (single scalar probe, no catalog scan)
+        if not table_exists(table_name):
+            return {"exists": [], "new": rows}
+
+        try:
+            schema = get_table_schema(table_name)
+        except ValueError:
             return {"exists": [], "new": rows}
 
         # Identify common columns for comparison
-        common_cols = list(set(existing_df.columns) & set(input_df.columns))
+        common_cols = [c for c in input_df.columns if c in schema]
         if not common_cols:
             # Try to map columns using validate_data (which now uses LLM)
             print("DEBUG: No common columns found. Attempting to map columns with LLM...")
             validation_result = validate_data(rows, table_name)
-            
+
             if "error" not in validation_result and "data" in validation_result:
                 mapped_rows = validation_result["data"]
                 # Re-create DataFrame with mapped data
                 input_df = pd.DataFrame(mapped_rows)
                 input_df = input_df.drop(columns=[c for c in input_df.columns if c.startswith("_")], errors='ignore')
                 # Re-check common columns
-                common_cols = list(set(existing_df.columns) & set(input_df.columns))
-        
+                common_cols = [c for c in input_df.columns if c in schema]
+
         if not common_cols:
             return {"exists": [], "new": rows}
 
-        # Create signatures for comparison (concat all common values)
-        existing_sigs = existing_df[common_cols].astype(str).agg('-'.join, axis=1)
-        input_sigs = input_df[common_cols].astype(str).agg('-'.join, axis=1)
-        
-        exists_mask = input_sigs.isin(existing_sigs)
-        
-        exists_rows = []
-        new_rows = []
-        
-        for i, is_exist in enumerate(exists_mask):
-            if is_exist:
-                exists_rows.append(rows[i])
-            else:
-                new_rows.append(rows[i])
-                
+        # Fetch only candidate rows: a parameterized composite-key IN means
+        # the database ships back at most len(rows) matches instead of the
+        # whole table crossing the wire into pandas.
+        key_cols = [sql_column(c) for c in common_cols]
+        key_tuples = list(dict.fromkeys(
+            input_df[common_cols].itertuples(index=False, name=None)))
+
+        # Chunk the IN list so one query never binds more than ~900
+        # parameters: oversized IN clauses blow up parse/plan time and can
+        # exceed SQLite's bound-variable limit. Candidate rows go straight
+        # from the driver into a set of stringified tuples — no DataFrame
+        # materialization for data we only need membership tests on.
+        chunk_size = max(1, 900 // max(1, len(common_cols)))
+        existing_keys = set()
+        with engine.connect() as conn:
+            for start in range(0, len(key_tuples), chunk_size):
+                chunk = key_tuples[start:start + chunk_size]
+                stmt = (
+                    select(*key_cols)
+                    .select_from(sql_table(table_name))
+                    .where(tuple_(*key_cols).in_(chunk))
+                )
+                existing_keys.update(
+                    tuple(str(v) for v in row) for row in conn.execute(stmt))
+
+        if not existing_keys:
+            return {"exists": [], "new": rows}
+
+        # str() both sides so DB-typed and JSON-typed values compare alike
+        input_keys = [tuple(str(v) for v in t) for t in
+                      input_df[common_cols].itertuples(index=False, name=None)]
+
+        exists_rows = [rows[i] for i, k in enumerate(input_keys) if k in existing_keys]
+        new_rows = [rows[i] for i, k in enumerate(input_keys) if k not in existing_keys]
+
         return {"exists": exists_rows, "new": new_rows}
 
     except Exception as e:
         print(f"Check Error: {e}")
         # Fallback: assume all new if check fails
-        return {"exists": [], "new": json.loads(data)}
+        return {"exists": [], "new": rows}
+
+@app.post("/check-existence")
+async def check_existence(
+    data: str = Form(...),
+    table_name: str = Form(...)
+):
+    rows = orjson.loads(data)
+    if not rows:
+        return {"exists": [], "new": []}
+
+    # The frontend re-asks the same question every time the user pages
+    # back and forth, so identical (table, payload) requests within the
+    # TTL are answered from memory. /save clears the cache — that's the
+    # only local write path that can change the answer.
+    key = (table_name,
+           hashlib.blake2b(data.encode(), digest_size=16).digest())
+    now = time.monotonic()
+    with _EXIST_CACHE_LOCK:
+        hit = _EXIST_CACHE.get(key)
+        if hit is not None and now - hit[0] < _EXIST_CACHE_TTL:
+            _EXIST_CACHE.move_to_end(key)
+            return hit[1]
+
+    result = await asyncio.to_thread(_check_existence_sync, rows, table_name)
+
+    with _EXIST_CACHE_LOCK:
+        _EXIST_CACHE[key] = (now, result)
+        while len(_EXIST_CACHE) > _EXIST_CACHE_MAX:
+            _EXIST_CACHE.popitem(last=False)
+    return result
 
 @app.post("/save")
 async def save_to_db(
@@ -981,7 +1645,7 @@ async def save_to_db(
     table_name: str = Form(...)
 ):
     try:
-        rows = json.loads(data)
+        rows = orjson.loads(data)
         if not rows:
              return {"message": "No data to save"}
              
@@ -1020,9 +1684,14 @@ async def save_to_db(
         if df.empty:
             return {"message": "No valid data to save (rows empty or missing UWI)"}
 
-        # Insert into DB (append mode)
-        df.to_sql(table_name, engine, if_exists='append', index=False, method='multi')
-        
+        # Insert into DB (append mode); runs in a worker thread so the
+        # event loop stays free during the round trip
+        await asyncio.to_thread(_bulk_insert, df, table_name)
+
+        # The rows just written may flip /check-existence answers
+        with _EXIST_CACHE_LOCK:
+            _EXIST_CACHE.clear()
+
         return {"message": f"Successfully saved {len(df)} rows to {table_name}"}
     except Exception as e:
         error_msg = str(e)
@@ -1041,104 +1710,189 @@ async def save_to_db(
 @app.post("/export")
 async def export_csv(data: str = Form(...), table_name: str = Form(...)):
     """Exports ONLY valid rows to CSV matching SQL schema"""
-    rows = json.loads(data)
+    rows = orjson.loads(data)
     
     # Filter valid rows
     valid_rows = [r for r in rows if r.get('_status') == 'VALID']
     
     if not valid_rows:
         raise HTTPException(status_code=400, detail="No valid rows to export")
-        
-    df = pd.DataFrame(valid_rows)
-    
-    # Drop internal columns
-    cols_to_drop = [c for c in df.columns if c.startswith("_")]
-    df = df.drop(columns=cols_to_drop)
-    
-    # Ensure column order matches SQL schema
-    schema = get_table_schema(table_name)
-    # Add missing columns as empty
-    for col in schema.keys():
-        if col not in df.columns:
-            df[col] = None
-            
-    # Reorder
-    df = df[list(schema.keys())]
-    
-    output_path = os.path.join(UPLOAD_DIR, f"{table_name}_export.csv")
-    df.to_csv(output_path, index=False)
-    
-    return FileResponse(output_path, filename=f"{table_name}.csv")
+
+    # The only transforms are column ordering and filling absent columns,
+    # both of which csv.DictWriter does natively (fieldnames + restval),
+    # so the rows stream straight to the response without ever building a
+    # DataFrame. extrasaction='ignore' drops the _status/_warning columns.
+    fieldnames = list(_schema_bundle(table_name).schema.keys())
+
+    def iter_csv():
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=fieldnames,
+                                extrasaction="ignore", restval="")
+        writer.writeheader()
+        for row in valid_rows:
+            writer.writerow(row)
+            if buf.tell() > 65536:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    return StreamingResponse(
+        iter_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={table_name}.csv"},
+    )
+
+@lru_cache(maxsize=1)
+def _template_styles():
+    """Reportlab style objects shared across /generate-template calls.
+
+    getSampleStyleSheet allocates dozens of ParagraphStyle objects and
+    the TableStyle is identical every time; build both once. Lives
+    behind lru_cache so reportlab still imports lazily.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ])
+    return styles['Title'], table_style
+
+@lru_cache(maxsize=16)
+def _template_bytes(table_name: str) -> bytes:
+    """Builds the template PDF for a table, once per process.
+
+    The output is a pure function of the table schema (one header row,
+    one dummy row), so after the first Platypus layout pays off the cost
+    every later request is a memory copy.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+    cols = list(_schema_bundle(table_name).display_columns)
+
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=landscape(letter))
+    elements = []
+
+    title_style, table_style = _template_styles()
+    elements.append(Paragraph(f"Sample Report for {table_name}", title_style))
+    elements.append(Spacer(1, 20))
+
+    # Create Dummy Data
+    data = [cols] # Header
+    dummy_row = [f"Test {c}" for c in cols] # Row 1
+    data.append(dummy_row)
+
+    t = Table(data)
+    t.setStyle(table_style)
+    elements.append(t)
+
+    doc.build(elements)
+    return buf.getvalue()
 
 @app.post("/generate-template")
 async def generate_template(table_name: str = Form(...)):
     """Generates a perfect PDF template for the given SQL table"""
     try:
-        schema = get_table_schema(table_name)
-        # Filter system columns
-        cols = [k for k in schema.keys() if k.upper() not in IGNORED_COLUMNS]
-        
-        output_path = os.path.join(UPLOAD_DIR, f"{table_name}_template.pdf")
-        doc = SimpleDocTemplate(output_path, pagesize=landscape(letter))
-        elements = []
-        
-        styles = getSampleStyleSheet()
-        elements.append(Paragraph(f"Sample Report for {table_name}", styles['Title']))
-        elements.append(Spacer(1, 20))
-        
-        # Create Dummy Data
-        data = [cols] # Header
-        dummy_row = [f"Test {c}" for c in cols] # Row 1
-        data.append(dummy_row)
-        
-        t = Table(data)
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        elements.append(t)
-        
-        doc.build(elements)
-        return FileResponse(output_path, filename=f"{table_name}_template.pdf")
+        # Platypus layout is CPU-bound; keep the first (uncached) build
+        # off the event loop
+        pdf = await asyncio.to_thread(_template_bytes, table_name)
+        return Response(
+            content=pdf,
+            media_type="application/pdf",
+            headers={"Content-Disposition":
+                     f"attachment; filename={table_name}_template.pdf"},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/export-pdf")
 async def export_pdf(data: str = Form(...), table_name: str = Form(...)):
-    """Exports extraction results to a PDF report"""
-    rows = json.loads(data)
+    """Exports extraction results to a PDF report.
+
+    Draws rows directly on a canvas: Platypus lays out every cell as a
+    separate Flowable, which dominates runtime for wide many-row dumps.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.pdfgen import canvas
+
+    rows = orjson.loads(data)
     if not rows:
         raise HTTPException(status_code=400, detail="No data to export")
-        
-    output_path = os.path.join(UPLOAD_DIR, f"{table_name}_report.pdf")
-    doc = SimpleDocTemplate(output_path, pagesize=landscape(letter))
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    elements.append(Paragraph(f"Extraction Report: {table_name}", styles['Title']))
-    elements.append(Spacer(1, 12))
-    
-    # Prepare Table Data
-    # Get all keys from first row (schema)
+
+    page_w, page_h = landscape(letter)
+    margin = 36
+    font_size = 8
+    line_height = 11
+
     headers = [k for k in rows[0].keys() if not k.startswith("_")]
-    table_data = [headers]
-    
-    for row in rows:
-        table_data.append([str(row.get(k, "")) for k in headers])
-        
-    t = Table(table_data, repeatRows=1)
-    t.setStyle(TableStyle([
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-    ]))
-    elements.append(t)
-    doc.build(elements)
-    return FileResponse(output_path, filename=f"{table_name}_report.pdf")
+
+    # Pre-measure column widths once from the longest cell per column
+    # (approx. char width at 8pt), clamped so wide text truncates rather
+    # than pushing columns off the page
+    char_w = font_size * 0.55
+    col_widths = []
+    for h in headers:
+        longest = max(len(str(h)), max((len(str(r.get(h, ""))) for r in rows), default=0))
+        col_widths.append(min(max(longest * char_w, 35.0), 130.0))
+    scale = min(1.0, (page_w - 2 * margin) / max(1.0, sum(col_widths)))
+    col_widths = [w * scale for w in col_widths]
+
+    def render():
+        # Build straight into memory: the old disk file doubled the IO,
+        # raced concurrent exports of the same table and was never
+        # cleaned up
+        buf = io.BytesIO()
+        c = canvas.Canvas(buf, pagesize=landscape(letter))
+
+        def start_page(first: bool) -> float:
+            y = page_h - margin
+            if first:
+                c.setFont("Helvetica-Bold", 14)
+                c.drawString(margin, y, f"Extraction Report: {table_name}")
+                y -= 2 * line_height
+            c.setFont("Helvetica-Bold", font_size)
+            x = margin
+            for h, w in zip(headers, col_widths):
+                c.drawString(x, y, str(h)[:int(w / char_w)])
+                x += w
+            c.setFont("Helvetica", font_size)
+            return y - line_height
+
+        y = start_page(first=True)
+        for row in rows:
+            if y < margin:
+                c.showPage()
+                y = start_page(first=False)
+            x = margin
+            for h, w in zip(headers, col_widths):
+                val = row.get(h, "")
+                if val is not None and val != "":
+                    c.drawString(x, y, str(val)[:int(w / char_w)])
+                x += w
+            y -= line_height
+
+        c.save()
+        buf.seek(0)
+        return buf
+
+    # Canvas drawing is CPU-bound; keep it off the event loop
+    buf = await asyncio.to_thread(render)
+    return StreamingResponse(
+        buf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={table_name}_report.pdf"},
+    )
 
 if __name__ == "__main__":
     import uvicorn